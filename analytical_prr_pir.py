@@ -2,12 +2,71 @@
 import numpy as np
 from scipy.special import erf
 import math
+from functools import lru_cache
+from numba import njit, prange
+from scipy.optimize import brentq
+from joblib import Parallel, delayed, parallel_config
 from calculations import *
 
 
+@njit(parallel=True, fastmath=True, cache=True)
+def _reduce_ps(psr, cn, R, RU, spsr, rc1, rc2, channels, p_res_ik):
+    """
+    Fused per-d_ij reduction over all interferer positions d_ik.
+
+    Applies calculate_u_dik, calculate_o_dik, calculate_mu, calculate_p_dik
+    and calculate_ps_dik elementwise and accumulates log(ps) to avoid
+    underflow of long products. ps is clipped to [1e-300, 1] before the
+    log, and 1 - prod(ps) is recovered with expm1 to keep precision when
+    the outage probability is small.
+
+    Parameters:
+    - psr: PSR at each d_ik.
+    - cn: Common neighbors count at each d_ik.
+    - R, RU: Total and utilized resources.
+    - spsr: Sensed Packet Sensing Ratio.
+    - rc1, rc2: Resource configuration parameters.
+    - channels: Total number of communication channels.
+    - p_res_ik: Probability of resource reselection.
+
+    Returns:
+    - Outage probabilities (1 - prod(ps)) for SPC6G and NRV2X.
+    """
+    acc = 0.0
+    acc_nr = 0.0
+    scale = (channels / (R - RU)) ** 2
+    for k in prange(psr.shape[0]):
+        u_dik = (RU**2 / R) * (1 - cn[k] / spsr) + RU * (cn[k] / spsr)
+        o_dik = R - 2 * RU + u_dik
+        mu_dik = 1 - (1 - (2 / (rc1 + rc2))) * psr[k]
+        p_dik = mu_dik * o_dik * scale
+        ps_dik = (1 - p_dik) + p_dik * (1 - p_res_ik)
+        acc += math.log(min(max(ps_dik, 1e-300), 1.0))
+        acc_nr += math.log(min(max(1 - p_dik, 1e-300), 1.0))
+    return -math.expm1(acc), -math.expm1(acc_nr)
+
+
+@lru_cache(maxsize=None)
+def _precompute_linear(fc, P_t_dB, P_s_dB, N_0_dB, sinr_threshold_dB):
+    """
+    Convert the dB-domain parameters of a sweep point to linear scale.
+
+    Returns:
+    - K_0_dB, K_0, P_t, P_s, N_0 and sinr_threshold.
+    """
+    P_s = 10 ** (P_s_dB / 10)
+    P_t = 10 ** (P_t_dB / 10)
+    K_0_dB = -(32.4 + 20 * math.log10(fc))  # Path loss constant in dB
+    K_0 = 10 ** (K_0_dB / 10)
+    N_0 = 10 ** (N_0_dB / 10)
+    sinr_threshold = 10 ** (sinr_threshold_dB / 10)
+    return K_0_dB, K_0, P_t, P_s, N_0, sinr_threshold
+
+
 def calculate_analytical_results(
     channels, sinr_threshold_dB, beta, P_t_dB, fc, alpha, P_s_dB, N_0_dB, 
-    maxchannel, slot, s, rc1, rc2, rri, p_res_ik, max_distance, step_distance
+    maxchannel, slot, s, rc1, rc2, rri, p_res_ik, max_distance, step_distance,
+    n_jobs=1
 ):
     """
     Calculate analytical PRR and PIR for SPC6G and NRV2X protocols.
@@ -29,65 +88,73 @@ def calculate_analytical_results(
     - p_res_ik: Probability of successful reception.
     - max_distance: Maximum distance between transmitter and receiver.
     - step_distance: Distance increment for analysis.
+    - n_jobs: Number of worker processes for the distance sweep (1 runs serially,
+      -1 uses all cores).
 
     Returns:
-    - PRR and PIR results for SPC6G and NRV2X protocols.
+    - PRR and PIR arrays (one value per distance) for SPC6G and NRV2X protocols.
     """
     # Convert parameters from dB to linear scale
-    P_s = 10 ** (P_s_dB / 10)
-    P_t = 10 ** (P_t_dB / 10)
-    K_0_dB = -(32.4 + 20 * math.log10(fc))  # Path loss constant in dB
-    K_0 = 10 ** (K_0_dB / 10)
-    N_0 = 10 ** (N_0_dB / 10)
-    sinr_threshold = 10 ** (sinr_threshold_dB / 10)
+    K_0_dB, K_0, P_t, P_s, N_0, sinr_threshold = _precompute_linear(
+        fc, P_t_dB, P_s_dB, N_0_dB, sinr_threshold_dB
+    )
 
     # Initialize distance range
-    distances = list(range(0, max_distance + step_distance, step_distance))
-
-    # Initialize result containers
-    prr_spc6G, prr_nrv2x = [], []
-    pir_spc6G, pir_nrv2x = [], []
+    distances = np.arange(0, max_distance + step_distance, step_distance)
 
     # Calculate resources (R) and sensing ratios
     channel_slot = maxchannel / channels
     R = maxchannel * (rri / slot)
+
+    def ru_excess(P_s_dB):
+        spsr = SPSR(beta, P_t_dB, P_s_dB, K_0_dB, alpha)
+        return calculate_RU(R, spsr, channels / R) - (1 - s) * R
+
+    # Adjust sensing threshold in 3 dB steps: RU decreases monotonically with
+    # P_s_dB, so locate the crossing by root finding and round up to the
+    # first step that satisfies the constraint
+    if ru_excess(P_s_dB) > 0:
+        # Widen the bracket until it contains the crossing
+        P_s_dB_upper = P_s_dB + 60
+        while ru_excess(P_s_dB_upper) > 0:
+            P_s_dB_upper += 60
+        P_s_dB_root = brentq(ru_excess, P_s_dB, P_s_dB_upper)
+        P_s_dB += 3 * math.ceil((P_s_dB_root - P_s_dB) / 3)
+
     spsr = SPSR(beta, P_t_dB, P_s_dB, K_0_dB, alpha)
     RU = calculate_RU(R, spsr, channels / R)
-      
-    # Adjust sensing threshold
-    while RU > (1 - s) * R:
-        P_s_dB += 3  # Increment noise power
-        spsr = SPSR(beta, P_t_dB, P_s_dB, K_0_dB, alpha)
-        RU = calculate_RU(R, spsr, channels / R)
 
-    # Loop through distances and calculate metrics
-    for d_ij in distances:
+    # PSR over the reference grid is invariant across d_ij once P_s_dB is fixed
+    psr_i = reference_psr(P_t_dB, P_s_dB, K_0_dB, alpha)
+
+    def _compute_one(d_ij):
         d_int = calculate_d_int(P_t, K_0, sinr_threshold, d_ij + 1, alpha, N_0)
         d_min, d_max = d_ij - d_int, d_ij + d_int
-        d_ik_range = range(int(d_min), int(d_max), int(1 / beta))
-
-        ps_values, ps_dik_nr_values = [], []
-        for dik in d_ik_range:
-            d_ik = abs(dik)
-            psr_value = PSR(d_ik, P_t_dB, P_s_dB, K_0_dB, alpha)
-            common_neighbors_count = common_neighbors(beta,  P_t_dB, P_s_dB, K_0_dB, alpha, d_ik)
-            u_dik = calculate_u_dik(R, RU, common_neighbors_count, spsr)
-            o_dik = calculate_o_dik(R, RU, u_dik)
-            mu_dik=calculate_mu( rc1, rc2, psr_value)
-            p_dik = calculate_p_dik(mu_dik, o_dik, channels, R - RU)
-            ps_dik = calculate_ps_dik(p_dik, RU/R)
-            ps_dik_nr = 1 - p_dik
-            
-
-            ps_values.append(ps_dik)
-            ps_dik_nr_values.append(ps_dik_nr)
-            
+        # Sample interferers every 1/beta metres (mean vehicle spacing)
+        d_ik = np.abs(np.arange(d_min, d_max, 1.0 / beta))
+
+        # Evaluate every interferer position d_ik at once
+        psr_value = PSR(d_ik, P_t_dB, P_s_dB, K_0_dB, alpha)
+        common_neighbors_count = common_neighbors(beta, P_t_dB, P_s_dB, K_0_dB, alpha, d_ik, psr_i)
+        p_o_spc6G, p_o_nrv2x = _reduce_ps(
+            psr_value, common_neighbors_count, R, RU, spsr, rc1, rc2, channels, RU / R
+        )
 
         # Calculate PRR and PIR for SPC6G and NRV2X
-        prr_spc6G.append(calculate_prr_dij(1-np.prod(ps_values)))
-        prr_nrv2x.append(calculate_prr_dij(1-np.prod(ps_dik_nr_values)))
-        pir_spc6G.append(calculate_pir_dij(1-np.prod(ps_values), rri))
-        pir_nrv2x.append(calculate_pir_dij(1-np.prod(ps_dik_nr_values), rri))
+        return (
+            calculate_prr_dij(p_o_spc6G),
+            calculate_prr_dij(p_o_nrv2x),
+            calculate_pir_dij(p_o_spc6G, rri),
+            calculate_pir_dij(p_o_nrv2x, rri),
+        )
 
-    return prr_spc6G, prr_nrv2x, pir_spc6G, pir_nrv2x
+    # Distances are independent, so optionally spread them across worker
+    # processes; Numba kernels in each worker are limited to one thread to
+    # avoid oversubscribing the cores
+    with parallel_config(backend='loky', inner_max_num_threads=1):
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_compute_one)(d_ij) for d_ij in distances
+        )
+    prr_spc6G, prr_nrv2x, pir_spc6G, pir_nrv2x = np.array(results, dtype=np.float64).T
 
+    return prr_spc6G, prr_nrv2x, pir_spc6G, pir_nrv2x
@@ -1,7 +1,15 @@
 # calculations.py
 import numpy as np
-from scipy.special import erf
+from scipy.special import ndtr
 import math
+from functools import lru_cache
+
+# Reference grid of vehicle positions (m) used for sensing-range sums; float32
+# halves the memory traffic of the (K, 4000) PSR matrices built on it
+REF_DISTANCES = np.arange(-2000, 2000, 1, dtype=np.float32)
+
+# Standard deviation of log-normal shadowing (dB)
+SHADOWING_STD_DB = 3.0
 
 def calculate_d_int(P_t, K_0, gamma, d_ij, alpha, N_0):
     """
@@ -156,7 +164,7 @@ def PathLoss(d, K0_dB, gamma):
     """
     d = np.asarray(d)
     PL = -K0_dB + 10 * gamma * np.log10(d)
-    std_dev = 3  # Example constant for standard deviation
+    std_dev = SHADOWING_STD_DB
     return PL, std_dev
 
 def PSR(d, Pt_dBm, P_sen_dBm, K0_dB, gamma):
@@ -171,13 +179,32 @@ def PSR(d, Pt_dBm, P_sen_dBm, K0_dB, gamma):
     gamma     -- Path loss exponent
 
     Returns:
-    PSR -- Packet Success Rate
+    PSR -- Packet Success Rate (same floating dtype as d)
     """
-    PL, std_dev = PathLoss(np.abs(d) + 1, K0_dB, gamma)
-    PSR_value = 0.5 * (1 + erf((Pt_dBm - PL - P_sen_dBm) / (std_dev * np.sqrt(2))))
+    # Same path loss as PathLoss, inlined to avoid its asarray copy and tuple return
+    PL = -K0_dB + 10 * gamma * np.log10(np.abs(d) + 1)
+    PSR_value = ndtr((Pt_dBm - PL - P_sen_dBm) / SHADOWING_STD_DB)
     return PSR_value
 
-def SPSR(beta, P_t_dB, P_s_dB, K_0_dB, alpha):
+@lru_cache(maxsize=64)
+def reference_psr(P_t_dB, P_s_dB, K_0_dB, alpha):
+    """
+    Compute PSR over REF_DISTANCES, memoized by parameter tuple.
+
+    Parameters:
+    P_t_dB  -- Transmission power in dB
+    P_s_dB  -- Receiver sensitivity in dB
+    K_0_dB  -- Reference path loss in dB
+    alpha   -- Path loss exponent
+
+    Returns:
+    psr_i -- Read-only PSR array aligned with REF_DISTANCES
+    """
+    psr_i = PSR(REF_DISTANCES, P_t_dB, P_s_dB, K_0_dB, alpha)
+    psr_i.setflags(write=False)
+    return psr_i
+
+def SPSR(beta, P_t_dB, P_s_dB, K_0_dB, alpha, psr_i=None):
     """
     Compute the Sensed Packet Sensing Ratio (SPSR).
 
@@ -187,13 +214,14 @@ def SPSR(beta, P_t_dB, P_s_dB, K_0_dB, alpha):
     P_s_dB  -- Receiver sensitivity in dB
     K_0_dB  -- Reference path loss in dB
     alpha   -- Path loss exponent
+    psr_i   -- Optional precomputed PSR over REF_DISTANCES
 
     Returns:
     SPSR -- Computed SPSR value
     """
-    distances = np.arange(-2000, 2000, 1)
-    psr_values = PSR(distances, P_t_dB, P_s_dB, K_0_dB, alpha)
-    spsr_sum = np.sum(psr_values)
+    if psr_i is None:
+        psr_i = reference_psr(P_t_dB, P_s_dB, K_0_dB, alpha)
+    spsr_sum = np.sum(psr_i, dtype=np.float64)
     return beta * spsr_sum
 
 def rho(d_i_k, sigma):
@@ -209,7 +237,7 @@ def rho(d_i_k, sigma):
     """
     return np.exp(-d_i_k)
 
-def common_neighbors(beta, P_t_dB, P_s_dB, K_0_dB, alpha, d_i_k):
+def common_neighbors(beta, P_t_dB, P_s_dB, K_0_dB, alpha, d_i_k, psr_i=None):
     """
     Calculate the number of common neighbors between two vehicles.
 
@@ -219,15 +247,23 @@ def common_neighbors(beta, P_t_dB, P_s_dB, K_0_dB, alpha, d_i_k):
     P_s_dB    -- Receiver sensitivity in dB
     K_0_dB    -- Reference path loss in dB
     alpha     -- Path loss exponent
-    d_i_k     -- Distance between vehicles
+    d_i_k     -- Distance between vehicles (scalar or 1D array)
+    psr_i     -- Optional precomputed PSR over REF_DISTANCES
 
     Returns:
-    common_neighbors -- Number of common neighbors
-    """
-    distances = np.arange(-2000, 2000, 1)
-    psr_i = PSR(distances, P_t_dB, P_s_dB, K_0_dB, alpha)
-    psr_k = PSR(np.abs(distances - d_i_k), P_t_dB, P_s_dB, K_0_dB, alpha)
-    correlation_factor = rho(d_i_k, 3)
-    common_psr = correlation_factor * np.minimum(psr_i, psr_k) + (1 - correlation_factor) * psr_i * psr_k
-    common_neighbors_sum = np.sum(common_psr)
-    return beta * common_neighbors_sum
+    common_neighbors -- Number of common neighbors (one per d_i_k)
+    """
+    d_i_k = np.asarray(d_i_k, dtype=float)
+    d_i_k_flat = np.atleast_1d(d_i_k)
+    if psr_i is None:
+        psr_i = reference_psr(P_t_dB, P_s_dB, K_0_dB, alpha)
+    # PSR of vehicle k over the reference grid, one row per d_i_k
+    shifted = np.abs(REF_DISTANCES[None, :] - d_i_k_flat[:, None].astype(np.float32))
+    psr_k = PSR(shifted, P_t_dB, P_s_dB, K_0_dB, alpha)
+    correlation_factor = rho(d_i_k_flat, 3)
+    # rho only varies per row, so sum each term (accumulated in float64)
+    # before mixing
+    independent_sum = np.dot(psr_k, psr_i.astype(np.float64))
+    correlated_sum = np.sum(np.minimum(psr_k, psr_i, out=psr_k), axis=1, dtype=np.float64)
+    common_neighbors_sum = correlation_factor * correlated_sum + (1 - correlation_factor) * independent_sum
+    return beta * common_neighbors_sum.reshape(d_i_k.shape)
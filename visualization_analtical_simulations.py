@@ -1,5 +1,11 @@
 # plot_analysis.py
 import pandas as pd
+import matplotlib
+# Render to PDF only when run as a script; imports (e.g. from main.ipynb)
+# keep the caller's backend and show each figure
+show_plots = __name__ != '__main__'
+if not show_plots:
+    matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
 import os
@@ -10,17 +16,12 @@ def ensure_folder_exists(folder_path):
     if not os.path.exists(folder_path):
         os.makedirs(folder_path)
 
-# Function to compare beta with a given tolerance
-def compare_beta_with_tolerance(beta1, beta2, tol=1e-3):
-    return abs(beta1 - beta2) < tol
-
-# Function to find the communication range
-def find_communication_range(data, PRR_threshold):
-    valid_data = data[data['cumulative_PDR'] >= PRR_threshold]
-    if not valid_data.empty:
-        return valid_data['distance_bin'].max()
-    else:
-        return 0  # Return 0 if no distance satisfies the condition
+# Function to map each group key to NumPy arrays of the requested columns
+def index_plot_columns(df, group_keys, columns):
+    return {
+        key: {column: group[column].to_numpy() for column in columns}
+        for key, group in df.groupby(group_keys)
+    }
 
 # Set plot parameters for IEEE Transactions style
 plt.rcParams.update({
@@ -49,10 +50,27 @@ metric_df['protocol_type'] = metric_df['protocol_type'].map(protocol_names)
 # Map num_lanes to beta (reverse relationship)
 metric_df['beta'] = metric_df['num_lanes'] / 40
 
+# Round beta onto a 1e-3 grid so both datasets share hashable lookup keys
+analytical_df['beta_key'] = np.round(analytical_df['beta'] / 1e-3) * 1e-3
+
+# Match simulated beta to analytical beta within tolerance (vectorized)
+metric_df['beta_key'] = np.nan
+metric_beta = metric_df['beta'].to_numpy()
+for beta, beta_key in analytical_df[['beta', 'beta_key']].drop_duplicates().to_numpy():
+    metric_df.loc[np.isclose(metric_beta, beta, atol=1e-3), 'beta_key'] = beta_key
+
+# Index both datasets once by (protocol, MCS, numerology, beta), keeping only
+# the plotted columns as NumPy arrays
+group_keys = ['protocol_type', 'MCS', 'numerology', 'beta_key']
+plot_columns = ['distance_bin', 'cumulative_PDR', 'cumulative_PIR']
+analytical_groups = index_plot_columns(analytical_df, group_keys, plot_columns)
+metric_groups = index_plot_columns(metric_df, group_keys, plot_columns)
+
 # Unique values for MCS, numerology, and protocol
 unique_mcs = analytical_df['MCS'].unique()
 unique_numerology = analytical_df['numerology'].unique()
 unique_protocols = ['SPC6G', 'NRV2X']
+unique_betas = analytical_df['beta'].unique()
 
 # Plot settings
 output_folder = 'SPS6G_plots'
@@ -62,31 +80,19 @@ ensure_folder_exists(output_folder)
 for mcs in unique_mcs:
     for numerology in unique_numerology:
         # PDR Plot
-        plt.figure()
+        fig, ax = plt.subplots()
         for protocol in unique_protocols:
             protocol_name = protocol_names.get(protocol, f'{protocol}')
 
-            # Filter analytical and metric data
-            analytical_data = analytical_df[
-                (analytical_df['protocol_type'] == protocol) &
-                (analytical_df['MCS'] == mcs) &
-                (analytical_df['numerology'] == numerology)
-            ]
-
-            metric_data = metric_df[
-                (metric_df['protocol_type'] == protocol) &
-                (metric_df['MCS'] == mcs) &
-                (metric_df['numerology'] == numerology)
-            ]
-
             # Plot data for each beta
-            for beta in analytical_data['beta'].unique():
-                analytical_data_beta = analytical_data[analytical_data['beta'] == beta]
-                metric_data_beta = metric_data[metric_data['beta'].apply(lambda x: compare_beta_with_tolerance(x, beta))]
+            for beta in unique_betas:
+                key = (protocol, mcs, numerology, np.round(beta / 1e-3) * 1e-3)
+                analytical_data_beta = analytical_groups.get(key)
+                metric_data_beta = metric_groups.get(key)
 
                 # Plot Analytical Data
-                if not analytical_data_beta.empty:
-                    plt.plot(
+                if analytical_data_beta is not None:
+                    ax.plot(
                         analytical_data_beta['distance_bin'],
                         analytical_data_beta['cumulative_PDR'],
                         label=f'Ana. {protocol_name}, $\\beta$={beta}',
@@ -94,8 +100,8 @@ for mcs in unique_mcs:
                     )
 
                 # Plot Simulation Data
-                if not metric_data_beta.empty:
-                    plt.plot(
+                if metric_data_beta is not None:
+                    ax.plot(
                         metric_data_beta['distance_bin'],
                         metric_data_beta['cumulative_PDR'],
                         label=f'Sim. {protocol_name}, $\\beta$={beta}',
@@ -103,41 +109,31 @@ for mcs in unique_mcs:
                     )
 
         # Customize PDR plot
-        plt.ylim(0.7, 1)
-        plt.xlabel('Distance (m)')
-        plt.ylabel('PRR')
-        plt.legend()
-        plt.grid(True)
-        plt.tight_layout()
-        plt.savefig(f'{output_folder}/PDR_MCS{mcs}_Numerology{numerology}.pdf', format='pdf')
-        plt.show()
+        ax.set_ylim(0.7, 1)
+        ax.set_xlabel('Distance (m)')
+        ax.set_ylabel('PRR')
+        ax.legend()
+        ax.grid(True)
+        fig.tight_layout()
+        fig.savefig(f'{output_folder}/PDR_MCS{mcs}_Numerology{numerology}.pdf', format='pdf')
+        if show_plots:
+            plt.show()
+        plt.close(fig)
 
         # PIR Plot
-        plt.figure()
+        fig, ax = plt.subplots()
         for protocol in unique_protocols:
             protocol_name = protocol_names.get(protocol, f'{protocol}')
 
-            # Filter analytical and metric data
-            analytical_data = analytical_df[
-                (analytical_df['protocol_type'] == protocol) &
-                (analytical_df['MCS'] == mcs) &
-                (analytical_df['numerology'] == numerology)
-            ]
-
-            metric_data = metric_df[
-                (metric_df['protocol_type'] == protocol) &
-                (metric_df['MCS'] == mcs) &
-                (metric_df['numerology'] == numerology)
-            ]
-
             # Plot data for each beta
-            for beta in analytical_data['beta'].unique():
-                analytical_data_beta = analytical_data[analytical_data['beta'] == beta]
-                metric_data_beta = metric_data[metric_data['beta'].apply(lambda x: compare_beta_with_tolerance(x, beta))]
+            for beta in unique_betas:
+                key = (protocol, mcs, numerology, np.round(beta / 1e-3) * 1e-3)
+                analytical_data_beta = analytical_groups.get(key)
+                metric_data_beta = metric_groups.get(key)
 
                 # Plot Analytical Data
-                if not analytical_data_beta.empty:
-                    plt.plot(
+                if analytical_data_beta is not None:
+                    ax.plot(
                         analytical_data_beta['distance_bin'],
                         analytical_data_beta['cumulative_PIR'],
                         label=f'Ana. {protocol_name}, $\\beta$={beta}',
@@ -145,8 +141,8 @@ for mcs in unique_mcs:
                     )
 
                 # Plot Simulation Data
-                if not metric_data_beta.empty:
-                    plt.plot(
+                if metric_data_beta is not None:
+                    ax.plot(
                         metric_data_beta['distance_bin'],
                         metric_data_beta['cumulative_PIR'],
                         label=f'Sim. {protocol_name}, $\\beta$={beta}',
@@ -154,30 +150,31 @@ for mcs in unique_mcs:
                     )
 
         # Customize PIR plot
-        plt.ylim(0.1, 0.18)
-        plt.xlabel('Distance (m)')
-        plt.ylabel('PIR (s)')
-        plt.legend()
-        plt.grid(True)
-        plt.tight_layout()
-        plt.savefig(f'{output_folder}/PIR_MCS{mcs}_Numerology{numerology}.pdf', format='pdf')
-        plt.show()
+        ax.set_ylim(0.1, 0.18)
+        ax.set_xlabel('Distance (m)')
+        ax.set_ylabel('PIR (s)')
+        ax.legend()
+        ax.grid(True)
+        fig.tight_layout()
+        fig.savefig(f'{output_folder}/PIR_MCS{mcs}_Numerology{numerology}.pdf', format='pdf')
+        if show_plots:
+            plt.show()
+        plt.close(fig)
 
 # Communication Range vs MCS
-unique_betas = analytical_df['beta'].unique()
 PRR_threshold = 0.98
-communication_ranges = {protocol: {beta: [] for beta in unique_betas} for protocol in unique_protocols}
-
-for protocol in unique_protocols:
-    for beta in unique_betas:
-        for mcs in unique_mcs:
-            analytical_data_beta_mcs = analytical_df[
-                (analytical_df['protocol_type'] == protocol) &
-                (analytical_df['MCS'] == mcs) &
-                (analytical_df['beta'] == beta)
-            ]
-            comm_range = find_communication_range(analytical_data_beta_mcs, PRR_threshold)
-            communication_ranges[protocol][beta].append(comm_range)
+# Largest distance meeting the PRR threshold for every (protocol, beta, MCS);
+# combinations with no qualifying distance get a range of 0
+communication_ranges = (
+    analytical_df[analytical_df['cumulative_PDR'] >= PRR_threshold]
+    .groupby(['protocol_type', 'beta', 'MCS'])['distance_bin'].max()
+    .unstack(fill_value=0)
+    .reindex(
+        index=pd.MultiIndex.from_product([unique_protocols, unique_betas]),
+        columns=unique_mcs,
+        fill_value=0
+    )
+)
 
 # Generate bar plots
 color_map = get_cmap('tab10')
@@ -189,25 +186,28 @@ space_between_protocols = 0.15
 index = np.arange(len(unique_mcs))
 group_width = (len(unique_protocols) * len(unique_betas) * bar_width) + space_between_protocols
 
+fig, ax = plt.subplots()
 for i, protocol in enumerate(unique_protocols):
     for j, beta in enumerate(unique_betas):
         bar_positions = index + i * (len(unique_betas) * (bar_width + space_between_betas)) + j * (bar_width + space_between_betas) + i * space_between_protocols
-        plt.bar(
+        ax.bar(
             bar_positions,
-            communication_ranges[protocol][beta],
+            communication_ranges.loc[(protocol, beta)].to_numpy(),
             bar_width,
             label=f'{protocol}, $\\beta$={beta}',
             color=colors[i * len(unique_betas) + j]
         )
 
 # Customize bar plot
-plt.xlabel('MCS Index')
-plt.ylabel('PRR Distance (m)')
-plt.xticks(index + group_width / 2 - bar_width / 2, unique_mcs)
-plt.legend(loc='upper center', bbox_to_anchor=(0.4, 1))
-plt.grid(True, axis='y')
-plt.tight_layout()
+ax.set_xlabel('MCS Index')
+ax.set_ylabel('PRR Distance (m)')
+ax.set_xticks(index + group_width / 2 - bar_width / 2, unique_mcs)
+ax.legend(loc='upper center', bbox_to_anchor=(0.4, 1))
+ax.grid(True, axis='y')
+fig.tight_layout()
 
 # Save bar plot
-plt.savefig(f'{output_folder}/Communication_Range_vs_MCS_BarPlot.pdf', format='pdf')
-plt.show()
+fig.savefig(f'{output_folder}/Communication_Range_vs_MCS_BarPlot.pdf', format='pdf')
+if show_plots:
+    plt.show()
+plt.close(fig)
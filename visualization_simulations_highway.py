@@ -1,5 +1,11 @@
 # plot_simulation_highway.py
 import pandas as pd
+import matplotlib
+# Render to PDF only when run as a script; imports (e.g. from main.ipynb)
+# keep the caller's backend and show each figure
+show_plots = __name__ != '__main__'
+if not show_plots:
+    matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import os
 
@@ -42,7 +48,7 @@ for mcs in unique_mcs:
     for numerology in unique_numerology:
 
         # Plot PDR (Packet Delivery Ratio)
-        plt.figure()
+        fig, ax = plt.subplots()
         for protocol in unique_protocols:
             # Filter simulation data for PDR
             metric_data = metric_df[
@@ -53,7 +59,7 @@ for mcs in unique_mcs:
 
             # Plot simulation data if available
             if not metric_data.empty:
-                plt.plot(
+                ax.plot(
                     metric_data['distance_bin'],
                     metric_data['cumulative_PDR'],
                     label=f'{protocol}',
@@ -61,19 +67,21 @@ for mcs in unique_mcs:
                 )
 
         # Customize PDR plot
-        #plt.ylim(0.7, 1)
-        plt.xlabel('Distance (m)')
-        plt.ylabel('PRR')
-        plt.legend()
-        plt.grid(True)
-        plt.tight_layout()
+        #ax.set_ylim(0.7, 1)
+        ax.set_xlabel('Distance (m)')
+        ax.set_ylabel('PRR')
+        ax.legend()
+        ax.grid(True)
+        fig.tight_layout()
 
         # Save PDR plot
-        plt.savefig(f'{output_folder}/PDR_MCS{mcs}_Numerology{numerology}.pdf', format='pdf')
-        plt.show()
+        fig.savefig(f'{output_folder}/PDR_MCS{mcs}_Numerology{numerology}.pdf', format='pdf')
+        if show_plots:
+            plt.show()
+        plt.close(fig)
 
         # Plot PIR (Packet Inter-Reception Rate)
-        plt.figure()
+        fig, ax = plt.subplots()
         for protocol in unique_protocols:
             # Filter simulation data for PIR
             metric_data = metric_df[
@@ -84,7 +92,7 @@ for mcs in unique_mcs:
 
             # Plot simulation data if available
             if not metric_data.empty:
-                plt.plot(
+                ax.plot(
                     metric_data['distance_bin'],
                     metric_data['cumulative_PIR'],
                     label=f'{protocol}',
@@ -92,13 +100,15 @@ for mcs in unique_mcs:
                 )
 
         # Customize PIR plot
-        #plt.ylim(0.1, 0.18)
-        plt.xlabel('Distance (m)')
-        plt.ylabel('PIR (s)')
-        plt.legend()
-        plt.grid(True)
-        plt.tight_layout()
+        #ax.set_ylim(0.1, 0.18)
+        ax.set_xlabel('Distance (m)')
+        ax.set_ylabel('PIR (s)')
+        ax.legend()
+        ax.grid(True)
+        fig.tight_layout()
 
         # Save PIR plot
-        plt.savefig(f'{output_folder}/PIR_MCS{mcs}_Numerology{numerology}.pdf', format='pdf')
-        plt.show()
+        fig.savefig(f'{output_folder}/PIR_MCS{mcs}_Numerology{numerology}.pdf', format='pdf')
+        if show_plots:
+            plt.show()
+        plt.close(fig)